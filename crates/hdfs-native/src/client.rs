@@ -580,6 +580,7 @@ pub struct FileStatus {
     pub group: String,
     pub modification_time: u64,
     pub access_time: u64,
+    pub block_size: u64,
 }
 
 impl FileStatus {
@@ -603,6 +604,7 @@ impl FileStatus {
             group: value.group,
             modification_time: value.modification_time,
             access_time: value.access_time,
+            block_size: value.blocksize(),
         }
     }
 }
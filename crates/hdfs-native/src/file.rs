@@ -52,6 +52,16 @@ impl FileReader {
         }
     }
 
+    /// Returns the current position in the file
+    pub fn tell(&self) -> usize {
+        self.position
+    }
+
+    /// Sets the position in the file used by [Self::read] and [Self::read_buf]
+    pub fn seek(&mut self, pos: usize) {
+        self.position = pos;
+    }
+
     /// Read up to `len` bytes into a new [Bytes] object, advancing the internal position in the file.
     /// An empty [Bytes] object will be returned if the end of the file has been reached.
     pub async fn read(&mut self, len: usize) -> Result<Bytes> {
@@ -66,6 +76,7 @@ impl FileReader {
 
     /// Read up to `buf.len()` bytes into the provided slice, advancing the internal position in the file.
     /// Returns the number of bytes that were read, or 0 if the end of the file has been reached.
+    /// Only the first `n` bytes of `buf` are written to if fewer than `buf.len()` bytes remain.
     pub async fn read_buf(&mut self, buf: &mut [u8]) -> Result<usize> {
         if self.position >= self.file_length() {
             Ok(0)
@@ -73,7 +84,7 @@ impl FileReader {
             let offset = self.position;
             self.position = usize::min(self.position + buf.len(), self.file_length());
             let read_bytes = self.position - offset;
-            self.read_range_buf(buf, offset).await?;
+            self.read_range_buf(&mut buf[..read_bytes], offset).await?;
             Ok(read_bytes)
         }
     }
@@ -191,6 +191,7 @@ mod test {
         // Path is empty, I guess because we already know what file we just got the info for?
         assert_eq!(status.path, "/testfile");
         assert_eq!(status.length, TEST_FILE_INTS * 4);
+        assert!(status.block_size > 0);
         Ok(())
     }
 
@@ -228,6 +229,8 @@ mod test {
             .list_status("/testdir", false)
             .await
             .is_ok_and(|s| s.is_empty()));
+        // Directories don't have a block size
+        assert_eq!(client.get_file_info("/testdir").await?.block_size, 0);
 
         client.delete("/testdir", false).await?;
         assert!(client.list_status("/testdir", false).await.is_err());
@@ -276,6 +279,13 @@ mod test {
 
         assert_bufs_equal(&file_contents, &read_data, None);
 
+        // Reading into a buffer larger than the rest of the file only fills what's left
+        let mut reader = client.read("/newfile").await?;
+        let mut buf = vec![0u8; 8192];
+        assert_eq!(reader.read_buf(&mut buf).await?, 4096);
+        assert_bufs_equal(&file_contents, &&buf[..4096], None);
+        assert_eq!(reader.read_buf(&mut buf).await?, 0);
+
         let mut data = BytesMut::new();
         for i in 0..1024 {
             file_contents.put_i32(i);
@@ -1,9 +1,12 @@
 import io
-from typing import Iterator, Optional
-from typing_extensions import Buffer
+from typing import TYPE_CHECKING, Iterator
 
 from ._internal import *
 
+if TYPE_CHECKING:
+    # Only needed for annotations, skip the import cost at runtime
+    from typing_extensions import Buffer
+
 class FileReader(io.RawIOBase):
     
     def __init__(self, inner: "RawFileReader"):
@@ -30,6 +33,13 @@ class FileReader(io.RawIOBase):
     def readall(self) -> bytes:
         return self.read()
 
+    def readinto(self, buffer: "Buffer") -> int:
+        """Read up to `len(buffer)` bytes into `buffer`, returning the number of bytes read"""
+        if not isinstance(buffer, bytearray):
+            # Make sure lengths and slices are in bytes, whatever the buffer's item type
+            buffer = memoryview(buffer).cast("B")
+        return self.inner.read_into(buffer)
+
     def read_range(self, offset: int, len: int) -> bytes:
         """Read `len` bytes from the file starting at `offset`. Doesn't affect the position in the file"""
         return self.inner.read_range(offset, len)
@@ -45,8 +55,11 @@ class FileWriter(io.RawIOBase):
     def writable(self) -> bool:
         return True
 
-    def write(self, buf: Buffer) -> int:
-        """Writes `buf` to the file. Always writes all bytes"""
+    def write(self, buf: "Buffer") -> int:
+        """
+        Writes `buf` to the file. Always writes all bytes. Safe to call from multiple threads, each
+        buffer is written to the file contiguously.
+        """
         return self.inner.write(buf)
 
     def close(self) -> None:
@@ -11,6 +11,7 @@ class FileStatus:
     group: str
     modification_time: int
     access_time: int
+    block_size: int
 
 class WriteOptions:
     block_size: Optional[int]
@@ -26,6 +27,12 @@ class RawFileReader:
     def read(self, len: int) -> bytes:
         """Reads `len` bytes from the file, advancing the position in the file"""
 
+    def read_into(self, buf: Buffer) -> int:
+        """
+        Reads up to `len(buf)` bytes into `buf`, which must be a `bytearray` or a writable byte
+        `memoryview`, advancing the position in the file. The position is left unchanged on error.
+        """
+
     def read_range(self, offset: int, len: int) -> bytes:
         """Read `len` bytes from the file starting at `offset`. Doesn't affect the position in the file"""
 
@@ -1,16 +1,24 @@
-use std::borrow::Cow;
+use std::os::raw::{c_char, c_int};
 use std::sync::Arc;
 
 use ::hdfs_native::file::{FileReader, FileWriter};
-use ::hdfs_native::WriteOptions;
 use ::hdfs_native::{
     client::{FileStatus, ListStatusIterator},
     Client,
 };
+use ::hdfs_native::{HdfsError, WriteOptions};
 use bytes::Bytes;
 use log::LevelFilter;
-use pyo3::{exceptions::PyRuntimeError, prelude::*};
-use tokio::runtime::Runtime;
+use pyo3::{
+    exceptions::{PyBufferError, PyRuntimeError, PyTypeError},
+    ffi, intern,
+    prelude::*,
+    types::{PyByteArray, PyBytes, PySlice},
+};
+use tokio::{
+    runtime::Runtime,
+    sync::{Mutex, RwLock},
+};
 
 mod error;
 
@@ -18,6 +26,32 @@ use crate::error::PythonHdfsError;
 
 type PyHdfsResult<T> = Result<T, PythonHdfsError>;
 
+// `PyBUF_READ` from the CPython headers, for creating a read-only memoryview
+const PYBUF_READ: c_int = 0x100;
+
+static RUNTIME: std::sync::Mutex<Option<(u32, Arc<Runtime>)>> = std::sync::Mutex::new(None);
+
+/// Returns the Tokio runtime shared by every client in the process, creating it on first use.
+/// Each runtime spawns a worker thread per core, so one per client wastes threads for programs
+/// that talk to several clusters. A forked child inherits the runtime without any of its threads,
+/// so a new one is created whenever the process ID changes.
+fn get_runtime() -> PyResult<Arc<Runtime>> {
+    let mut runtime = RUNTIME.lock().unwrap_or_else(|err| err.into_inner());
+    let pid = std::process::id();
+
+    match runtime.as_ref() {
+        Some((owner, rt)) if *owner == pid => return Ok(Arc::clone(rt)),
+        // Shutting down the inherited runtime would wait on threads that don't exist in this
+        // process, so leak it instead
+        Some((_, rt)) => std::mem::forget(Arc::clone(rt)),
+        None => (),
+    }
+
+    let rt = Arc::new(Runtime::new().map_err(|err| PyRuntimeError::new_err(err.to_string()))?);
+    *runtime = Some((pid, Arc::clone(&rt)));
+    Ok(rt)
+}
+
 #[pyclass(get_all, frozen, name = "FileStatus")]
 struct PyFileStatus {
     path: String,
@@ -28,6 +62,7 @@ struct PyFileStatus {
     group: String,
     modification_time: u64,
     access_time: u64,
+    block_size: u64,
 }
 
 impl From<FileStatus> for PyFileStatus {
@@ -41,13 +76,14 @@ impl From<FileStatus> for PyFileStatus {
             group: value.group,
             modification_time: value.modification_time,
             access_time: value.access_time,
+            block_size: value.block_size,
         }
     }
 }
 
 #[pyclass(name = "FileStatusIter")]
 struct PyFileStatusIter {
-    inner: ListStatusIterator,
+    inner: Mutex<ListStatusIterator>,
     rt: Arc<Runtime>,
 }
 
@@ -57,10 +93,16 @@ impl PyFileStatusIter {
         slf
     }
 
-    fn __next__(mut slf: PyRefMut<'_, Self>) -> PyHdfsResult<Option<PyFileStatus>> {
-        // This is dumb, figure out how to get around the double borrow here
-        let rt = Arc::clone(&slf.rt);
-        if let Some(result) = rt.block_on(slf.inner.next()) {
+    fn __next__(slf: PyRef<'_, Self>) -> PyHdfsResult<Option<PyFileStatus>> {
+        let py = slf.py();
+        let iter: &Self = &slf;
+        // Fetching the next listing page is a NameNode round trip, let other threads run meanwhile.
+        // Threads sharing this iterator take turns on the lock.
+        let next = py.allow_threads(|| {
+            iter.rt
+                .block_on(async { iter.inner.lock().await.next().await })
+        });
+        if let Some(result) = next {
             Ok(Some(PyFileStatus::from(result?)))
         } else {
             Ok(None)
@@ -70,33 +112,104 @@ impl PyFileStatusIter {
 
 #[pyclass]
 struct RawFileReader {
-    inner: FileReader,
+    inner: RwLock<FileReader>,
+    // Reused by `read_into` so filling a caller's buffer doesn't allocate on every call
+    scratch: Mutex<Vec<u8>>,
+    file_length: usize,
     rt: Arc<Runtime>,
 }
 
 #[pymethods]
 impl RawFileReader {
     pub fn file_length(&self) -> usize {
-        self.inner.file_length()
+        self.file_length
     }
 
-    pub fn read(&mut self, len: i64) -> PyHdfsResult<Cow<[u8]>> {
-        let read_len = if len < 0 {
-            self.inner.remaining()
+    pub fn read<'py>(&self, py: Python<'py>, len: i64) -> PyHdfsResult<&'py PyBytes> {
+        // Positional reads need exclusive access, so threads sharing this reader take turns
+        let buf = py.allow_threads(|| {
+            self.rt.block_on(async {
+                let mut inner = self.inner.write().await;
+                let read_len = if len < 0 {
+                    inner.remaining()
+                } else {
+                    len as usize
+                };
+                inner.read(read_len).await
+            })
+        })?;
+        // Copy straight from the read buffer into the Python object, no intermediate Vec
+        Ok(PyBytes::new(py, &buf))
+    }
+
+    pub fn read_into(&self, py: Python, buf: &PyAny) -> PyResult<usize> {
+        // Check the target before touching the file, so a bad buffer doesn't consume any data
+        let bytearray = buf.downcast::<PyByteArray>().ok();
+        if bytearray.is_none() && buf.getattr(intern!(py, "readonly"))?.is_true()? {
+            return Err(PyTypeError::new_err("Cannot read into a read-only buffer"));
+        }
+        let len = buf.len()?;
+
+        let (mut inner, scratch, read_len) = py
+            .allow_threads(|| {
+                self.rt.block_on(async {
+                    let inner = self.inner.write().await;
+                    let mut scratch = self.scratch.lock().await;
+                    let read_len = usize::min(len, inner.remaining());
+                    if scratch.len() < read_len {
+                        scratch.resize(read_len, 0);
+                    }
+                    let offset = inner.tell();
+                    inner
+                        .read_range_buf(&mut scratch[..read_len], offset)
+                        .await?;
+                    Ok::<_, HdfsError>((inner, scratch, read_len))
+                })
+            })
+            .map_err(PythonHdfsError::from)?;
+
+        // Back under the GIL. The position only moves once the data is in the caller's buffer,
+        // so a failed copy doesn't lose it.
+        let data = &scratch[..read_len];
+        if let Some(bytearray) = bytearray {
+            let dst = unsafe { bytearray.as_bytes_mut() };
+            if dst.len() < read_len {
+                return Err(PyBufferError::new_err("Buffer was resized during read"));
+            }
+            dst[..read_len].copy_from_slice(data);
         } else {
-            len as usize
-        };
-        Ok(Cow::from(
-            self.rt.block_on(self.inner.read(read_len))?.to_vec(),
-        ))
+            // The limited API has no buffer protocol before 3.11, so hand the target a read-only
+            // view of the scratch space and let it copy from that
+            let view: &PyAny = unsafe {
+                py.from_owned_ptr_or_err(ffi::PyMemoryView_FromMemory(
+                    data.as_ptr() as *mut c_char,
+                    read_len as ffi::Py_ssize_t,
+                    PYBUF_READ,
+                ))?
+            };
+            let copied = buf.set_item(PySlice::new(py, 0, read_len as isize, 1), view);
+            // The view points into the scratch space, so make sure it can't outlive this call
+            view.call_method0(intern!(py, "release"))?;
+            copied?;
+        }
+
+        let offset = inner.tell();
+        inner.seek(offset + read_len);
+        Ok(read_len)
     }
 
-    pub fn read_range(&self, offset: usize, len: usize) -> PyHdfsResult<Cow<[u8]>> {
-        Ok(Cow::from(
+    pub fn read_range<'py>(
+        &self,
+        py: Python<'py>,
+        offset: usize,
+        len: usize,
+    ) -> PyHdfsResult<&'py PyBytes> {
+        // Range reads don't move the position, so they can run concurrently with each other
+        let buf = py.allow_threads(|| {
             self.rt
-                .block_on(self.inner.read_range(offset, len))?
-                .to_vec(),
-        ))
+                .block_on(async { self.inner.read().await.read_range(offset, len).await })
+        })?;
+        Ok(PyBytes::new(py, &buf))
     }
 }
 
@@ -145,18 +258,26 @@ impl PyWriteOptions {
 
 #[pyclass]
 struct RawFileWriter {
-    inner: FileWriter,
+    inner: Mutex<FileWriter>,
     rt: Arc<Runtime>,
 }
 
 #[pymethods]
 impl RawFileWriter {
-    pub fn write(&mut self, buf: Vec<u8>) -> PyHdfsResult<usize> {
-        Ok(self.rt.block_on(self.inner.write(Bytes::from(buf)))?)
+    pub fn write(&self, py: Python, buf: Vec<u8>) -> PyHdfsResult<usize> {
+        // Release the GIL while waiting on the DataNodes so other Python threads can make progress.
+        // Threads sharing this writer queue up on the lock, and each buffer is written contiguously.
+        Ok(py.allow_threads(|| {
+            self.rt
+                .block_on(async { self.inner.lock().await.write(Bytes::from(buf)).await })
+        })?)
     }
 
-    pub fn close(&mut self) -> PyHdfsResult<()> {
-        Ok(self.rt.block_on(self.inner.close())?)
+    pub fn close(&self, py: Python) -> PyHdfsResult<()> {
+        Ok(py.allow_threads(|| {
+            self.rt
+                .block_on(async { self.inner.lock().await.close().await })
+        })?)
     }
 }
 
@@ -178,69 +299,79 @@ impl RawClient {
 
         Ok(RawClient {
             inner: Client::new(url).map_err(PythonHdfsError::from)?,
-            rt: Arc::new(
-                tokio::runtime::Runtime::new()
-                    .map_err(|err| PyRuntimeError::new_err(err.to_string()))?,
-            ),
+            rt: get_runtime()?,
         })
     }
 
-    pub fn get_file_info(&self, path: &str) -> PyHdfsResult<PyFileStatus> {
-        Ok(self
-            .rt
-            .block_on(self.inner.get_file_info(path))
+    pub fn get_file_info(&self, py: Python, path: &str) -> PyHdfsResult<PyFileStatus> {
+        Ok(py
+            .allow_threads(|| self.rt.block_on(self.inner.get_file_info(path)))
             .map(PyFileStatus::from)?)
     }
 
     pub fn list_status(&self, path: &str, recursive: bool) -> PyFileStatusIter {
         let inner = self.inner.list_status_iter(path, recursive);
         PyFileStatusIter {
-            inner,
+            inner: Mutex::new(inner),
             rt: Arc::clone(&self.rt),
         }
     }
 
-    pub fn read(&self, path: &str) -> PyHdfsResult<RawFileReader> {
-        let file_reader = self.rt.block_on(self.inner.read(path))?;
+    pub fn read(&self, py: Python, path: &str) -> PyHdfsResult<RawFileReader> {
+        let file_reader = py.allow_threads(|| self.rt.block_on(self.inner.read(path)))?;
 
         Ok(RawFileReader {
-            inner: file_reader,
+            scratch: Mutex::new(Vec::new()),
+            file_length: file_reader.file_length(),
+            inner: RwLock::new(file_reader),
             rt: Arc::clone(&self.rt),
         })
     }
 
-    pub fn create(&self, src: &str, write_options: PyWriteOptions) -> PyHdfsResult<RawFileWriter> {
-        let file_writer = self
-            .rt
-            .block_on(self.inner.create(src, WriteOptions::from(write_options)))?;
+    pub fn create(
+        &self,
+        py: Python,
+        src: &str,
+        write_options: PyWriteOptions,
+    ) -> PyHdfsResult<RawFileWriter> {
+        let write_options = WriteOptions::from(write_options);
+        let file_writer =
+            py.allow_threads(|| self.rt.block_on(self.inner.create(src, write_options)))?;
 
         Ok(RawFileWriter {
-            inner: file_writer,
+            inner: Mutex::new(file_writer),
             rt: Arc::clone(&self.rt),
         })
     }
 
-    pub fn append(&self, src: &str) -> PyHdfsResult<RawFileWriter> {
-        let file_writer = self.rt.block_on(self.inner.append(src))?;
+    pub fn append(&self, py: Python, src: &str) -> PyHdfsResult<RawFileWriter> {
+        let file_writer = py.allow_threads(|| self.rt.block_on(self.inner.append(src)))?;
 
         Ok(RawFileWriter {
-            inner: file_writer,
+            inner: Mutex::new(file_writer),
             rt: Arc::clone(&self.rt),
         })
     }
 
-    pub fn mkdirs(&self, path: &str, permission: u32, create_parent: bool) -> PyHdfsResult<()> {
-        Ok(self
-            .rt
-            .block_on(self.inner.mkdirs(path, permission, create_parent))?)
+    pub fn mkdirs(
+        &self,
+        py: Python,
+        path: &str,
+        permission: u32,
+        create_parent: bool,
+    ) -> PyHdfsResult<()> {
+        Ok(py.allow_threads(|| {
+            self.rt
+                .block_on(self.inner.mkdirs(path, permission, create_parent))
+        })?)
     }
 
-    pub fn rename(&self, src: &str, dst: &str, overwrite: bool) -> PyHdfsResult<()> {
-        Ok(self.rt.block_on(self.inner.rename(src, dst, overwrite))?)
+    pub fn rename(&self, py: Python, src: &str, dst: &str, overwrite: bool) -> PyHdfsResult<()> {
+        Ok(py.allow_threads(|| self.rt.block_on(self.inner.rename(src, dst, overwrite)))?)
     }
 
-    pub fn delete(&self, path: &str, recursive: bool) -> PyHdfsResult<bool> {
-        Ok(self.rt.block_on(self.inner.delete(path, recursive))?)
+    pub fn delete(&self, py: Python, path: &str, recursive: bool) -> PyHdfsResult<bool> {
+        Ok(py.allow_threads(|| self.rt.block_on(self.inner.delete(path, recursive)))?)
     }
 }
 
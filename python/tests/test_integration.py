@@ -1,4 +1,8 @@
+import array
 import io
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+import pytest
 from hdfs_native import Client, WriteOptions
 
 def test_integration(minidfs: str):
@@ -7,6 +11,9 @@ def test_integration(minidfs: str):
     file_info = client.get_file_info("/testfile")
     
     assert file_info.path == "/testfile"
+    assert file_info.block_size > 0
+    # Directories don't have a block size
+    assert client.get_file_info("/").block_size == 0
 
     file_list = list(client.list_status("/", False))
     assert len(file_list) == 1
@@ -37,6 +44,32 @@ def test_integration(minidfs: str):
     for i in range(0, 32 * 1024 * 1024):
         assert data.read(4) == i.to_bytes(4, 'big')
 
+    with client.read("/testfile") as file:
+        buf = bytearray(8)
+        assert file.readinto(buf) == 8
+        assert buf == (0).to_bytes(4, 'big') + (1).to_bytes(4, 'big')
+
+        view = memoryview(bytearray(8))
+        assert file.readinto(view) == 8
+        assert view.tobytes() == (2).to_bytes(4, 'big') + (3).to_bytes(4, 'big')
+
+        ints = array.array("i", [0, 0])
+        assert file.readinto(ints) == 8
+        assert ints.tobytes() == (4).to_bytes(4, 'big') + (5).to_bytes(4, 'big')
+
+        # A failed read leaves the position where it was
+        with pytest.raises(TypeError):
+            file.readinto(bytes(8))
+        assert file.readinto(buf) == 8
+        assert buf == (6).to_bytes(4, 'big') + (7).to_bytes(4, 'big')
+
+        # Reads near the end of the file come up short, then return 0
+        file.read(len(file) - 40)
+        buf = bytearray(32)
+        assert file.readinto(buf) == 8
+        assert buf[:8] == (32 * 1024 * 1024 - 2).to_bytes(4, 'big') + (32 * 1024 * 1024 - 1).to_bytes(4, 'big')
+        assert file.readinto(buf) == 0
+
     with client.append("/testfile") as file:
         data = io.BytesIO()
 
@@ -51,4 +84,73 @@ def test_integration(minidfs: str):
     for i in range(0, 33 * 1024 * 1024):
         assert data.read(4) == i.to_bytes(4, 'big')
 
-    client.delete("/testfile", False)
\ No newline at end of file
+    client.delete("/testfile", False)
+
+    # Writes from several threads to one file each land contiguously
+    chunk_size = 1024 * 1024
+    with client.create("/testfile", WriteOptions()) as file:
+        with ThreadPoolExecutor(8) as executor:
+            written = list(executor.map(lambda i: file.write(bytes([i]) * chunk_size), range(16)))
+
+    assert written == [chunk_size] * 16
+
+    with client.read("/testfile") as file:
+        contents = file.read()
+
+    assert len(contents) == 16 * chunk_size
+    chunks = [contents[i:i + chunk_size] for i in range(0, len(contents), chunk_size)]
+    for chunk in chunks:
+        assert chunk == bytes([chunk[0]]) * chunk_size
+    assert sorted(chunk[0] for chunk in chunks) == list(range(16))
+
+    client.delete("/testfile", False)
+
+    # NameNode calls from several threads can share one client
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda i: client.mkdirs(f"/testdir/{i}", 0o755, True), range(32)))
+        statuses = list(executor.map(lambda i: client.get_file_info(f"/testdir/{i}"), range(32)))
+
+    assert [status.path for status in statuses] == [f"/testdir/{i}" for i in range(32)]
+    assert all(status.isdir for status in statuses)
+
+    # Several threads can pull from one listing
+    listing = client.list_status("/testdir", False)
+    with ThreadPoolExecutor(8) as executor:
+        listed = list(executor.map(lambda _: next(listing, None), range(40)))
+
+    assert sorted(status.path for status in listed if status is not None) == \
+        sorted(f"/testdir/{i}" for i in range(32))
+
+    client.delete("/testdir", True)
+
+    # Reads from several threads on one file each take a distinct, contiguous slice
+    with client.create("/testfile", WriteOptions()) as file:
+        file.write(b"".join(i.to_bytes(4, 'big') for i in range(1024 * 1024)))
+
+    with client.read("/testfile") as file:
+        with ThreadPoolExecutor(8) as executor:
+            chunks = list(executor.map(lambda _: file.read(64 * 1024), range(64)))
+
+    assert all(len(chunk) == 64 * 1024 for chunk in chunks)
+    chunks.sort(key=lambda chunk: int.from_bytes(chunk[:4], 'big'))
+    contents = b"".join(chunks)
+    for i in range(1024 * 1024):
+        assert contents[i * 4:i * 4 + 4] == i.to_bytes(4, 'big')
+
+    client.delete("/testfile", False)
+
+    # A client created in a forked child gets its own runtime instead of the parent's
+    client.create("/testfile", WriteOptions()).close()
+
+    def check_file_info():
+        assert Client(minidfs).get_file_info("/testfile").path == "/testfile"
+
+    child = multiprocessing.get_context("fork").Process(target=check_file_info)
+    child.start()
+    child.join(timeout=60)
+
+    if child.exitcode is None:
+        child.kill()
+    assert child.exitcode == 0
+
+    client.delete("/testfile", False)